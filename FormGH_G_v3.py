@@ -26,6 +26,8 @@ import time
 import uuid
 import webbrowser
 
+from description_index import DescriptionIndex, is_usable_description, load_index
+
 print("✅ Libraries imported successfully.")
 
 # --------------------------
@@ -68,14 +70,22 @@ print("✅ Resource path function defined.")
 
 # --------------------------
 # BACKGROUND CODE - Define function
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_background(bg_url):
+    """Download the background at most once an hour per process (failures are not cached)"""
+    response = requests.get(bg_url, timeout=10)
+    response.raise_for_status()
+    return base64.b64encode(response.content).decode()
+
 def apply_background():
     """Apply background to the app"""
-    cache_buster = random.randint(1000, 9999)
-    bg_url = "https://raw.githubusercontent.com/crgubanic/stylevision-product-entry/main/background2.jpg"
+    # STYLEVISION_BG_URL lets the load-test harness point this at a local fake host
+    bg_url = os.environ.get(
+        "STYLEVISION_BG_URL",
+        "https://raw.githubusercontent.com/crgubanic/stylevision-product-entry/main/background2.jpg"
+    )
     try:
-        response = requests.get(bg_url, timeout=10)
-        response.raise_for_status()
-        base64_bg = base64.b64encode(response.content).decode()
+        base64_bg = fetch_background(bg_url)
         st.markdown(
             f"""
             <style>
@@ -135,8 +145,12 @@ st.divider()
 
 # --------------------------
 # Load API key and initialize Groq client
+@st.cache_resource
+def get_groq_client(api_key):
+    return Groq(api_key=api_key)
+
 groq_api_key = st.secrets["GROQ_API_KEY"]
-client = Groq(api_key=groq_api_key)
+client = get_groq_client(groq_api_key)
 
 # --------------------------
 # CSV file to save entries
@@ -159,6 +173,26 @@ final_columns = [
 
 print("✅ CSV file initialized.")
 
+# --------------------------
+# Similarity index over past descriptions (MinHash + LSH, see description_index.py)
+MAX_VARIETY_RETRIES = 2
+MAX_AVOID_OPENINGS = 3  # Most similar past openings passed to the retry prompt
+
+index_file = resource_path(os.path.join("ecommerce", "description_index.jsonl"))
+
+@st.cache_resource
+def load_description_index(index_path, csv_path):
+    """Load the saved index once per process; seed it from the CSV the first time."""
+    try:
+        index = load_index(index_path, csv_path, final_columns)
+    except Exception as e:
+        print(f"❌ Description index error: {e}")
+        return DescriptionIndex(index_path)
+    print(f"✅ Description index loaded with {len(index)} entries.")
+    return index
+
+description_index = load_description_index(index_file, csv_file)
+
 # --------------------------
 # Generate unique Product ID
 def generate_new_pid():
@@ -192,6 +226,69 @@ if st.button("Clear Form"):
     st.session_state["p_id"] = generate_new_pid()
     st.rerun()
 
+# --------------------------
+# Static taxonomies (built once per process, shared by every session)
+@st.cache_resource
+def load_taxonomies():
+    return {
+        "products": (
+            "Blazer", "Clothing Set", "Bralette", "Dress", "Dupatta",
+            "Hoodie", "Jacket", "Jeans", "Joggers", "Jumpsuit", "Kurta", "Kurti",
+            "Lehenga", "Maternity", "Other", "Pants", "Pullover", "Saree", "Shawl", "Shirt",
+            "Shorts", "Skirt", "Sweater", "Sweatshirt", "T-Shirt", "Top", "Vest"
+        ),
+        "colour": (
+            "-- Select Colour --", "Beige", "Black", "Blue", "Bronze", "Brown", "Burgandy",
+            "Camel", "Champagne", "Charcoal", "Coffee", "Copper", "Coral", "Cream",
+            "Fuschia", "Gold", "Green", "Grey", "Khaki", "Magenta", "Maroon",
+            "Mauve", "Multi", "Navy", "Olive", "Orange", "Peach", "Pink", "Purple",
+            "Other", "Red", "Rose Gold", "Rust", "Silver", "Tan", "Taupe", "Teal",
+            "Turquoise", "Violet", "White", "Yellow"
+        ),
+        "pattern": (
+            "-- Select Pattern --", "Aari Work", "Abstract", "Animal", "Applique",
+            "Arjak", "Argyle", "Bagh", "Bandhani", "Batik", "Beads and Stones",
+            "Block Print", "Bohemian", "Boucle", "Brocade", "Camouflage",
+            "Cartoon / Graphic / Superhero", "Checked", "Chevron", "Chikankari",
+            "Colourblocked", "Cutdana Work", "Dabu", "Distressed", "Embellished",
+            "Embroidered", "Ethnic", "Fair Isle", "Faux Fur Trim",
+            "Faux Leather Trim", "Floral", "Foil", "Frills Bows and Ruffles",
+            "Fringe / Tassel", "Geometric", "Gotta Pattie", "Houndstooth", "Ikat",
+            "Jaali", "Kalamkari", "Kantha Work", "Khari", "Kutchi Embroidery",
+            "Leheriya", "Micro or Ditsy", "Military", "Mirror Work", "Monochrome",
+            "Mukash", "Nautical", "Ombre", "Paisley", "Patchwork", "Phulkari",
+            "Pleated", "Polka Dots", "Rivets", "Ruffles", "Screen Print", "Sequins",
+            "Sheer", "Shibori", "Shimmer", "Solid", "Stripes", "Tie Dye", "Tribal",
+            "Utility", "Zardozi", "Zari"
+        ),
+        "fabric": (
+            "Acrylic", "Bamboo", "Cashmere", "Chiffon", "Corduroy", "Cotton", "Denim",
+            "Elastane", "Fleece", "Georgette", "Hemp", "Leather", "Linen", "Lycocell",
+            "Lycra", "Modal", "Nylon", "Polyester", "Rayon", "Satin", "Silk", "Spandex",
+            "Suede", "Velvet", "Viscose", "Wool"
+        ),
+        "care": (
+            "Cold Water", "Cool Iron", "Do Not Bleach", "Dry Clean", "Hand Wash",
+            "Iron on Reverse", "Line Dry", "Machine Wash", "No Fabric Softener", "Tumble Dry", "Warm Water",
+            "Warm Iron"
+        ),
+        "fit": (
+            "Bodycon", "Bootcut", "Fitted", "Flare", "High-rise", "Loose", "Mid-rise",
+            "Oversized", "Regular", "Relaxed", "Skinny", "Slim", "Straight", "Tapered",
+            "Wide Leg"
+        ),
+        "garment_closure": (
+            "Button(s)", "Drawstring", "Elasticated", "Front-open", "Hook & Eye",
+            "Slip-on", "Snap", "Tie", "Toggle", "Zip"
+        ),
+        "occasion_region": (
+            "Casual", "Daily", "Ethnic", "Festive", "Formal", "Fusion", "Maternity",
+            "Outdoor", "Party", "Sports", "Traditional", "Western", "Work"
+        )
+    }
+
+taxonomies = load_taxonomies()
+
 # --------------------------
 # --------------------------
 # --------- DYNAMIC KEYS INITIALIZATION (SAFE SINGLE BLOCK) ---------
@@ -202,7 +299,7 @@ dynamic_keys = {
     "products": [],
     "brand": "",
     "price_str": "",
-    "colour": "",
+    "colour": "-- Select Colour --",
     "fit": [],
     "fabric": [],
     "pattern": [],
@@ -219,156 +316,25 @@ for key, default_value in dynamic_keys.items():
     if dynamic_key not in st.session_state:
         st.session_state[dynamic_key] = default_value
 
-#
-# #
-# #
-# # --------------------------
-# File uploader (DO NOT assign st.session_state for this key)
-#uploaded_file_input = st.file_uploader(
-#    "Upload Product Image (.jpg required)*",
-#    type=["jpg"],
-#    key=f"uploaded_file_stable"
-#)
-
-# Use stable reference in session_state
-#if uploaded_file_input is not None:
-#    st.session_state["uploaded_file_ref"] = uploaded_file_input
-
-# Generate filename for image
-#img_filename = f"{st.session_state['p_id']}.jpg"
-
-#uploaded_file_to_save = st.session_state.get("uploaded_file_ref")
-#if uploaded_file_to_save is not None:
-#    img_path = os.path.join(project_root, "img", img_filename)
-#    os.makedirs(os.path.dirname(img_path), exist_ok=True)
-#    with open(img_path, "wb") as f:
-#        f.write(uploaded_file_to_save.getbuffer())
-#    st.session_state["img"] = img_filename
-#    st.success(f"Image saved as {img_filename}")
-
 # --------------------------
-# Form Fields
-name = st.text_input("Product Name*", key=f"name_{rc}")
-
-products = st.multiselect(
-    "Product Type*", [
-        "Blazer", "Clothing Set", "Bralette", "Dress", "Dupatta",
-        "Hoodie", "Jacket", "Jeans", "Joggers", "Jumpsuit", "Kurta", "Kurti",
-        "Lehenga", "Maternity", "Other", "Pants", "Pullover", "Saree", "Shawl", "Shirt",
-        "Shorts", "Skirt", "Sweater", "Sweatshirt", "T-Shirt", "Top", "Vest"
-    ],
-    key=f"products_{rc}"
-)
-
-price_str = st.text_input("Price (USD)*", key=f"price_str_{rc}")
-price = None
-if price_str:
+# Sync dynamic keys to main session_state before saving or generating
+def sync_form_state(rc):
+    for key, default_value in dynamic_keys.items():
+        st.session_state[key] = st.session_state.get(f"{key}_{rc}", default_value)
+    st.session_state['name'] = st.session_state['name'].strip()
+    st.session_state['brand'] = st.session_state['brand'].strip()
+    price_str = st.session_state['price_str']
     try:
         float(price_str)
         st.session_state['price'] = price_str
     except ValueError:
-        st.error("Please enter a valid price, e.g., 808.08")
-        st.session_state['price'] = ""
-else:
-    st.session_state['price'] = ""
-
-colour = st.selectbox(
-    "Colour (Primary)*", [
-        "-- Select Colour --", "Beige", "Black", "Blue", "Bronze", "Brown", "Burgandy",
-        "Camel", "Champagne", "Charcoal", "Coffee", "Copper", "Coral", "Cream",
-        "Fuschia", "Gold", "Green", "Grey", "Khaki", "Magenta", "Maroon",
-        "Mauve", "Multi", "Navy", "Olive", "Orange", "Peach", "Pink", "Purple",
-        "Other", "Red", "Rose Gold", "Rust", "Silver", "Tan", "Taupe", "Teal",
-        "Turquoise", "Violet", "White", "Yellow"
-    ],
-    key=f"colour_{rc}"
-)
-
-pattern = st.multiselect("Pattern (Primary)*", [
-    "-- Select Pattern --", "Aari Work", "Abstract", "Animal", "Applique",
-    "Arjak", "Argyle", "Bagh", "Bandhani", "Batik", "Beads and Stones",
-    "Block Print", "Bohemian", "Boucle", "Brocade", "Camouflage",
-    "Cartoon / Graphic / Superhero", "Checked", "Chevron", "Chikankari",
-    "Colourblocked", "Cutdana Work", "Dabu", "Distressed", "Embellished",
-    "Embroidered", "Ethnic", "Fair Isle", "Faux Fur Trim",
-    "Faux Leather Trim", "Floral", "Foil", "Frills Bows and Ruffles",
-    "Fringe / Tassel", "Geometric", "Gotta Pattie", "Houndstooth", "Ikat",
-    "Jaali", "Kalamkari", "Kantha Work", "Khari", "Kutchi Embroidery",
-    "Leheriya", "Micro or Ditsy", "Military", "Mirror Work", "Monochrome",
-    "Mukash", "Nautical", "Ombre", "Paisley", "Patchwork", "Phulkari",
-    "Pleated", "Polka Dots", "Rivets", "Ruffles", "Screen Print", "Sequins",
-    "Sheer", "Shibori", "Shimmer", "Solid", "Stripes", "Tie Dye", "Tribal",
-    "Utility", "Zardozi", "Zari"
-], key=f"pattern_{rc}")
-
-brand = st.text_input("Brand Name*", key=f"brand_{rc}")
-
-fabric = st.multiselect("Fabric (choose all that apply)*", [
-    "Acrylic", "Bamboo", "Cashmere", "Chiffon", "Corduroy", "Cotton", "Denim",
-    "Elastane", "Fleece", "Georgette", "Hemp", "Leather", "Linen", "Lycocell",
-    "Lycra", "Modal", "Nylon", "Polyester", "Rayon", "Satin", "Silk", "Spandex",
-    "Suede", "Velvet", "Viscose", "Wool"
-], key=f"fabric_{rc}")
-
-# --------------------------
-# File uploader (DO NOT assign st.session_state for this key)
-uploaded_file_input = st.file_uploader(
-    "Upload Product Image (.jpg required)*",
-    type=["jpg"],
-    key=f"uploaded_file_stable"
-)
-
-# Use stable reference in session_state
-if uploaded_file_input is not None:
-    st.session_state["uploaded_file_ref"] = uploaded_file_input
-
-# Generate filename for image
-img_filename = f"{st.session_state['p_id']}.jpg"
-
-uploaded_file_to_save = st.session_state.get("uploaded_file_ref")
-if uploaded_file_to_save is not None:
-    img_path = os.path.join(project_root, "img", img_filename)
-    os.makedirs(os.path.dirname(img_path), exist_ok=True)
-    with open(img_path, "wb") as f:
-        f.write(uploaded_file_to_save.getbuffer())
-    st.session_state["img"] = img_filename
-    st.success(f"Image saved as {img_filename}")
+        st.session_state['price'] = ""  # Blocks Save (see missing_fields)
+    st.session_state['uploaded_file'] = st.session_state.get("uploaded_file_ref", None)
 
 # --------------------------
-# Multiselects continued
-care = st.multiselect("Care (choose all that apply)*", [
-    "Cold Water", "Cool Iron", "Do Not Bleach", "Dry Clean", "Hand Wash",
-    "Iron on Reverse", "Line Dry", "Machine Wash", "No Fabric Softener", "Tumble Dry", "Warm Water",
-    "Warm Iron"
-], key=f"care_{rc}")
-
-fit_options = [
-    "Bodycon", "Bootcut", "Fitted", "Flare", "High-rise", "Loose", "Mid-rise",
-    "Oversized", "Regular", "Relaxed", "Skinny", "Slim", "Straight", "Tapered",
-    "Wide Leg"
-]
-fit = st.multiselect("Fit (choose all that apply)*", fit_options, key=f"fit_{rc}")
-
-garment_closure = st.multiselect("Garment Closure (choose all that apply)*", [
-    "Button(s)", "Drawstring", "Elasticated", "Front-open", "Hook & Eye",
-    "Slip-on", "Snap", "Tie", "Toggle", "Zip"
-], key=f"garment_closure_{rc}")
-
-occasion_region = st.multiselect("Occasion & Region (for Dupattas) (choose all that apply)", [
-    "Casual", "Daily", "Ethnic", "Festive", "Formal", "Fusion", "Maternity",
-    "Outdoor", "Party", "Sports", "Traditional", "Western", "Work"
-], key=f"occasion_region_{rc}")
-
-# --------------------------
-# Sync dynamic keys to main session_state before saving or generating
-for key in dynamic_keys.keys():
-    if key != "uploaded_file":
-        st.session_state[key] = st.session_state.get(f"{key}_{rc}", dynamic_keys[key])
-st.session_state["uploaded_file"] = st.session_state.get(f"uploaded_file_{rc}") or st.session_state.get("uploaded_file_ref", None)
-
-# --------------------------
-# Product Details HTML
-def generate_product_details():
+# Product Details HTML (memoized on the attributes shown)
+@st.cache_data(max_entries=1000, show_spinner=False)
+def generate_product_details(name, products, colour, pattern, brand, fabric, care, fit, garment_closure, occasion_region):
     label_buckets = {
         "Product Name": ["name"],
         "Product Type": ["products"],
@@ -408,28 +374,108 @@ def generate_product_details():
             lines.append(f"{label}: {', '.join(safe_values)}")
     return "<br>".join(lines)
 
-if products or colour or brand or fabric:
-    st.markdown("### Product Details Preview")
-    st.markdown(f"""
-    <div style="
-        background-color: rgba(204, 51, 0, 0.75);
-        border: 1px solid #4a3a8c;
-        border-radius: 12px;
-        padding: 18px 24px;
-        font-size: 20px;
-        line-height: 1.6;
-        box-shadow: 0 0 8px rgba(0,0,0,0.3);
-        width: fit-content;
-        max-width: 80%;
-        margin: 0 auto 0 0;
-    ">
-        {generate_product_details()}
-    </div>
-    """, unsafe_allow_html=True)
+# --------------------------
+# Write the uploaded image as <p_id>.jpg (only when the upload or the Product ID changes)
+def save_uploaded_image(p_id):
+    img_filename = f"{p_id}.jpg"
+    uploaded_file_to_save = st.session_state.get("uploaded_file_ref")
+    if uploaded_file_to_save is None:
+        return None
+    img_key = (img_filename, getattr(uploaded_file_to_save, "file_id", id(uploaded_file_to_save)))
+    if st.session_state.get("img_saved_key") != img_key:
+        img_path = os.path.join(project_root, "img", img_filename)
+        os.makedirs(os.path.dirname(img_path), exist_ok=True)
+        with open(img_path, "wb") as f:
+            f.write(uploaded_file_to_save.getbuffer())
+        st.session_state["img_saved_key"] = img_key
+    st.session_state["img"] = img_filename
+    return img_filename
+
+# --------------------------
+# Form Fields (fragment: widget changes rerun only the form and its preview)
+@st.fragment
+def product_form():
+    # Fragment reruns reuse the function from the first full run, so read the
+    # reset counter from session_state rather than the module-level rc
+    rc = st.session_state.get("reset_counter", 0)
+    name = st.text_input("Product Name*", key=f"name_{rc}")
+
+    products = st.multiselect("Product Type*", taxonomies["products"], key=f"products_{rc}")
+
+    price_str = st.text_input("Price (USD)*", key=f"price_str_{rc}")
+    if price_str:
+        try:
+            float(price_str)
+        except ValueError:
+            st.error("Please enter a valid price, e.g., 808.08")
+
+    colour = st.selectbox("Colour (Primary)*", taxonomies["colour"], key=f"colour_{rc}")
+
+    pattern = st.multiselect("Pattern (Primary)*", taxonomies["pattern"], key=f"pattern_{rc}")
+
+    brand = st.text_input("Brand Name*", key=f"brand_{rc}")
+
+    fabric = st.multiselect("Fabric (choose all that apply)*", taxonomies["fabric"], key=f"fabric_{rc}")
+
+    # --------------------------
+    # File uploader (DO NOT assign st.session_state for this key)
+    uploaded_file_input = st.file_uploader(
+        "Upload Product Image (.jpg required)*",
+        type=["jpg"],
+        key=f"uploaded_file_stable"
+    )
+
+    # Use stable reference in session_state
+    if uploaded_file_input is not None:
+        st.session_state["uploaded_file_ref"] = uploaded_file_input
+
+    img_filename = save_uploaded_image(st.session_state['p_id'])
+    if img_filename:
+        st.success(f"Image saved as {img_filename}")
+
+    # --------------------------
+    # Multiselects continued
+    care = st.multiselect("Care (choose all that apply)*", taxonomies["care"], key=f"care_{rc}")
+
+    fit = st.multiselect("Fit (choose all that apply)*", taxonomies["fit"], key=f"fit_{rc}")
+
+    garment_closure = st.multiselect(
+        "Garment Closure (choose all that apply)*", taxonomies["garment_closure"], key=f"garment_closure_{rc}"
+    )
+
+    occasion_region = st.multiselect(
+        "Occasion & Region (for Dupattas) (choose all that apply)", taxonomies["occasion_region"],
+        key=f"occasion_region_{rc}"
+    )
+
+    if products or colour or brand or fabric:
+        details_html = generate_product_details(
+            name, tuple(products), colour, tuple(pattern), brand, tuple(fabric),
+            tuple(care), tuple(fit), tuple(garment_closure), tuple(occasion_region)
+        )
+        st.markdown("### Product Details Preview")
+        st.markdown(f"""
+        <div style="
+            background-color: rgba(204, 51, 0, 0.75);
+            border: 1px solid #4a3a8c;
+            border-radius: 12px;
+            padding: 18px 24px;
+            font-size: 20px;
+            line-height: 1.6;
+            box-shadow: 0 0 8px rgba(0,0,0,0.3);
+            width: fit-content;
+            max-width: 80%;
+            margin: 0 auto 0 0;
+        ">
+            {details_html}
+        </div>
+        """, unsafe_allow_html=True)
+
+product_form()
 
 # --------------------------
 # Description generation using Groq
-def generate_description(products, colour, pattern, brand, fabric, fit, garment_closure, care, occasion_region):
+def generate_description(name, products, colour, pattern, brand, fabric, fit, garment_closure, care, occasion_region, avoid_openings=()):
     # Gather only non-empty attributes
     attributes = {
         "Product Type": ", ".join(products) if products else None,
@@ -469,6 +515,12 @@ def generate_description(products, colour, pattern, brand, fabric, fit, garment_
     for k, v in filled_attributes.items():
         prompt_text += f"{k}: {v}\n"
 
+    # Negative context: openings the similarity index flagged as too close
+    if avoid_openings:
+        prompt_text += "\nDo NOT reuse or closely paraphrase any of these openings from other products:\n"
+        for opening in avoid_openings:
+            prompt_text += f"- {opening}\n"
+
     prompt_text += "\nOutput as a single, plain-text paragraph using correct British grammar."
 
     try:
@@ -488,203 +540,240 @@ def generate_description(products, colour, pattern, brand, fabric, fit, garment_
     return ""  # fallback
 
 # --------------------------
-# Generate Description Button
-st.markdown("<br>", unsafe_allow_html=True)
-if st.button("Generate Description"):
-    required_fields_filled = all([
-        name.strip(),
-        products,
-        brand.strip(),
-        fabric,
-        st.session_state.get("uploaded_file_ref") is not None,  # use stable key
-        colour != "-- Select Colour --",
-        pattern,
-        fit,
-        garment_closure,
-        care
-    ])
-    if not required_fields_filled:
-        st.error("Please fill in all mandatory fields before generating the description.")
-    else:
-        with st.spinner("Generating awesome description. Please wait (this artistry will take a few seconds)..."):
-            st.session_state['description'] = generate_description(
-                tuple(products),
-                colour,
-                tuple(pattern),
-                brand,
-                tuple(fabric),
-                tuple(fit),
-                tuple(garment_closure),
-                tuple(care),
-                tuple(occasion_region)
-            )
-
-        st.markdown("### Product Description Preview")
-        st.markdown(f"""
-        <div style="
-            background-color: rgba(204, 51, 0, 0.75);
-            border: 1px solid #4a3a8c;
-            border-radius: 12px;
-            padding: 20px;
-            font-size: 22px;
-            line-height: 1.6;
-            box-shadow: 0 0 10px rgba(0,0,0,0.4);
-        ">
-        {st.session_state['description']}
-        </div>
-        """, unsafe_allow_html=True)
-
-        # Note about formatting
-        st.markdown("""
-        <p style="font-family: Arial, sans-serif; font-size: 18px; color: #FFFFFF; font-style: italic; line-height: 1.5;">
-        <br>
-        (Note: Description is plain-text and formatted using Arial for better readability. 
-        If you make changes to this product before saving, please regenerate the description.)
-        </p>
-        """, unsafe_allow_html=True)
-
-# --------------------------
-# Initialize saving flag
-if "saving" not in st.session_state:
-    st.session_state["saving"] = False
-
-# Ensure all dynamic keys exist as lists
-for key in ["fit", "fabric", "pattern", "care", "garment_closure", "occasion_region"]:
-    dynamic_key = f"{key}_{rc}"
-    if dynamic_key not in st.session_state:
-        st.session_state[dynamic_key] = []
-
-# Sync only the dynamic-keyed inputs
-st.session_state['fit'] = st.session_state.get(f"fit_{rc}", [])
-st.session_state['fabric'] = st.session_state.get(f"fabric_{rc}", [])
-st.session_state['pattern'] = st.session_state.get(f"pattern_{rc}", [])
-st.session_state['care'] = st.session_state.get(f"care_{rc}", [])
-st.session_state['garment_closure'] = st.session_state.get(f"garment_closure_{rc}", [])
-st.session_state['occasion_region'] = st.session_state.get(f"occasion_region_{rc}", [])
-st.session_state['products'] = st.session_state.get(f"products_{rc}", [])
-st.session_state['name'] = st.session_state.get(f"name_{rc}", "").strip()
-st.session_state['brand'] = st.session_state.get(f"brand_{rc}", "").strip()
-st.session_state['price'] = st.session_state.get(f"price_str_{rc}", "")
-st.session_state['colour'] = st.session_state.get(f"colour_{rc}", "")
-st.session_state['uploaded_file'] = st.session_state.get("uploaded_file_ref", None)
-
-# Force re-enable save button if no save is actually happening
-if st.session_state.get("saving", True) and not st.session_state.get("description"):
-    st.session_state["saving"] = False
+# Generate and Save (fragment: button clicks rerun only this section)
+@st.fragment
+def product_actions():
+    rc = st.session_state.get("reset_counter", 0)  # Not the module-level rc (see product_form)
+    sync_form_state(rc)
+    name = st.session_state['name']
+    products = st.session_state['products']
+    brand = st.session_state['brand']
+    fabric = st.session_state['fabric']
+    colour = st.session_state['colour']
+    pattern = st.session_state['pattern']
+    fit = st.session_state['fit']
+    garment_closure = st.session_state['garment_closure']
+    care = st.session_state['care']
+    occasion_region = st.session_state['occasion_region']
+
+    # --------------------------
+    # Generate Description Button
+    st.markdown("<br>", unsafe_allow_html=True)
+    if st.button("Generate Description"):
+        required_fields_filled = all([
+            name.strip(),
+            products,
+            brand.strip(),
+            fabric,
+            st.session_state.get("uploaded_file_ref") is not None,  # use stable key
+            colour != "-- Select Colour --",
+            pattern,
+            fit,
+            garment_closure,
+            care
+        ])
+        if not required_fields_filled:
+            st.error("Please fill in all mandatory fields before generating the description.")
+        else:
+            with st.spinner("Generating awesome description. Please wait (this artistry will take a few seconds)..."):
+                st.session_state['description'] = generate_description(
+                    name,
+                    tuple(products),
+                    colour,
+                    tuple(pattern),
+                    brand,
+                    tuple(fabric),
+                    tuple(fit),
+                    tuple(garment_closure),
+                    tuple(care),
+                    tuple(occasion_region)
+                )
+
+                # Regenerate only if the index flags a near-duplicate opening or body
+                conflicts = []
+                for _ in range(MAX_VARIETY_RETRIES):
+                    if not is_usable_description(st.session_state['description']):
+                        break
+                    conflicts = description_index.query(st.session_state['description'], limit=MAX_AVOID_OPENINGS)
+                    if not conflicts:
+                        break
+                    retry = generate_description(
+                        name,
+                        tuple(products),
+                        colour,
+                        tuple(pattern),
+                        brand,
+                        tuple(fabric),
+                        tuple(fit),
+                        tuple(garment_closure),
+                        tuple(care),
+                        tuple(occasion_region),
+                        avoid_openings=tuple(conflicts)
+                    )
+                    # A failed retry keeps the last good draft (the warning below still applies)
+                    if not is_usable_description(retry):
+                        break
+                    st.session_state['description'] = retry
+                else:
+                    conflicts = description_index.query(st.session_state['description'], limit=MAX_AVOID_OPENINGS)
+                if conflicts:
+                    st.warning("This description is still similar to an existing product. Consider regenerating it.")
+
+            st.markdown("### Product Description Preview")
+            st.markdown(f"""
+            <div style="
+                background-color: rgba(204, 51, 0, 0.75);
+                border: 1px solid #4a3a8c;
+                border-radius: 12px;
+                padding: 20px;
+                font-size: 22px;
+                line-height: 1.6;
+                box-shadow: 0 0 10px rgba(0,0,0,0.4);
+            ">
+            {st.session_state['description']}
+            </div>
+            """, unsafe_allow_html=True)
+
+            # Note about formatting
+            st.markdown("""
+            <p style="font-family: Arial, sans-serif; font-size: 18px; color: #FFFFFF; font-style: italic; line-height: 1.5;">
+            <br>
+            (Note: Description is plain-text and formatted using Arial for better readability. 
+            If you make changes to this product before saving, please regenerate the description.)
+            </p>
+            """, unsafe_allow_html=True)
+
+    # --------------------------
+    # Force re-enable save button if no save is actually happening
+    if st.session_state.get("saving", True) and not st.session_state.get("description"):
+        st.session_state["saving"] = False
+
+    # --------------------------
+    # Save Product Button
+    if st.button("Save Product", disabled=st.session_state.get("saving", False)):
+        st.session_state["saving"] = True
+        with st.spinner("Saving your product..."):
+
+            missing_fields = []
+            if not st.session_state['name'].strip(): missing_fields.append("Product Name")
+            if not st.session_state['products']: missing_fields.append("Product Type")
+            if not st.session_state['price']: missing_fields.append("Price")
+            if not st.session_state['brand'].strip(): missing_fields.append("Brand Name")
+            if not st.session_state['fabric']: missing_fields.append("Fabric")
+            if st.session_state.get("uploaded_file_ref") is None: missing_fields.append("Product Image")  # stable key
+            if st.session_state['colour'] == "-- Select Colour --": missing_fields.append("Colour")
+            if not st.session_state['pattern']: missing_fields.append("Pattern")
+            if not st.session_state['fit']: missing_fields.append("Fit")
+            if not st.session_state['garment_closure']: missing_fields.append("Garment Closure")
+            if not st.session_state['care']: missing_fields.append("Care")
+
+            if missing_fields:
+                st.error(f"Please fill in all mandatory fields: {', '.join(missing_fields)}")
+                st.session_state["saving"] = False
+
+            else:
+                # The form fragment does not rerun on Save, so write the image for the ID being saved here
+                img_filename = save_uploaded_image(st.session_state["p_id"])
+
+                # Build row
+                base_row = {
+                    "p_id": st.session_state["p_id"],
+                    "name": st.session_state['name'].strip(),
+                    "products": ", ".join(st.session_state['products']).lower(),
+                    "price": st.session_state.get('price', ""),
+                    "brand": st.session_state['brand'].strip().lower(),
+                    "theme_color_pattern": f"{st.session_state['colour'].lower()}, {', '.join(st.session_state['pattern']).lower()}",
+                    "theme_fit": ", ".join(st.session_state['fit']).lower(),
+                    "theme_fabric_care": f"{', '.join(st.session_state['fabric']).lower()}, {', '.join(st.session_state['care']).lower()}",
+                    "garment_closure": ", ".join(st.session_state['garment_closure']).lower(),
+                    "occasion": ", ".join(st.session_state['occasion_region']).lower(),
+                    "img": img_filename,
+                    "description_generated": st.session_state.get("description", "")
+                }
+
+                # Deduplicate merged buckets as before
+                def dedup_buckets_row(row):
+                    fabric = set(map(str.strip, row['theme_fabric_care'].split(','))) if row['theme_fabric_care'] else set()
+                    colors = set(map(str.strip, row['theme_color_pattern'].split(','))) if row['theme_color_pattern'] else set()
+                    fit = set(map(str.strip, row['theme_fit'].split(','))) if row['theme_fit'] else set()
+                    colors -= fabric
+                    fit -= fabric | colors
+                    return pd.Series({
+                        'theme_merged_fabric_care': ', '.join(sorted(fabric)),
+                        'theme_merged_color_pattern': ', '.join(sorted(colors)),
+                        'theme_merged_fit': ', '.join(sorted(fit))
+                    })
+
+                merged_cols = dedup_buckets_row(base_row)
+                base_row.update(merged_cols.to_dict())
+
+                # Save formatted HTML
+                label_buckets = {
+                    "Color and Pattern": ['theme_merged_color_pattern'],
+                    "Fabric and Care": ['theme_merged_fabric_care'],
+                    "Fit": ['theme_merged_fit'],
+                    "Garment Closure": ['garment_closure'],
+                    "Occasion & Region (Dupatta)": ['occasion']
+                }
+
+                def format_row_html(row, buckets):
+                    lines = []
+                    for label, fields in buckets.items():
+                        values = []
+                        seen = set()
+                        for field in fields:
+                            if field in row and row[field]:
+                                for part in [x.strip() for x in str(row[field]).split(",") if x.strip()]:
+                                    if part.lower() not in seen:
+                                        values.append(part)
+                                        seen.add(part.lower())
+                        if values:
+                            lines.append(f"{label}: {', '.join(values)}")
+                    return "<br>".join(lines)
+
+                base_row["formatted"] = format_row_html(base_row, label_buckets)
+                base_row["description_generated"] = st.session_state.get("description", "")
+
+                # Save to CSV
+                df_final = pd.DataFrame([base_row]).reindex(columns=final_columns)
+                df_final.to_csv(csv_file, mode="a", index=False, header=False)
+                description_index.add(base_row["description_generated"])
+
+                # -----------------------------
+                # SESSION CSV LOGIC (added only)
+                if "session_products" not in st.session_state:
+                    st.session_state["session_products"] = pd.DataFrame(columns=final_columns)
+
+                st.session_state["session_products"] = pd.concat(
+                    [st.session_state["session_products"], df_final],
+                    ignore_index=True
+                )
+
+                # -----------------------------
+
+                st.session_state["save_notice"] = f"Product '{st.session_state.get('name', '')}' saved successfully with ID {st.session_state['p_id']}!  Product cannot be updated after saving."
+
+                # Reset for next product; rerun the whole app so the form picks up the new ID
+                st.session_state['p_id'] = generate_new_pid()
+                st.session_state['description'] = ""
+                st.session_state["saving"] = False
+                st.rerun(scope="app")
+
+    # Shown on the full rerun that follows a save
+    save_notice = st.session_state.pop("save_notice", None)
+    if save_notice:
+        csv_buffer = io.StringIO()
+        st.session_state["session_products"].to_csv(csv_buffer, index=False)
+        st.download_button(
+            label="Download Saved Product to CSV",
+            data=csv_buffer.getvalue().encode(),
+            file_name="saved_product.csv",
+            mime="text/csv"
+        )
+        st.success(save_notice)
 
-# --------------------------
-# Save Product Button
-if st.button("Save Product", disabled=st.session_state.get("saving", False)):
-    st.session_state["saving"] = True
-    with st.spinner("Saving your product..."):
-
-        missing_fields = []
-        if not st.session_state['name'].strip(): missing_fields.append("Product Name")
-        if not st.session_state['products']: missing_fields.append("Product Type")
-        if not st.session_state['brand'].strip(): missing_fields.append("Brand Name")
-        if not st.session_state['fabric']: missing_fields.append("Fabric")
-        if st.session_state.get("uploaded_file_ref") is None: missing_fields.append("Product Image")  # stable key
-        if st.session_state['colour'] == "-- Select Colour --": missing_fields.append("Colour")
-        if not st.session_state['pattern']: missing_fields.append("Pattern")
-        if not st.session_state['fit']: missing_fields.append("Fit")
-        if not st.session_state['garment_closure']: missing_fields.append("Garment Closure")
-        if not st.session_state['care']: missing_fields.append("Care")
-
-        if missing_fields:
-            st.error(f"Please fill in all mandatory fields: {', '.join(missing_fields)}")
-            st.session_state["saving"] = False
+product_actions()
 
-        else:
-            # Build row
-            base_row = {
-                "p_id": st.session_state["p_id"],
-                "name": st.session_state['name'].strip(),
-                "products": ", ".join(st.session_state['products']).lower(),
-                "price": st.session_state.get('price', ""),
-                "brand": st.session_state['brand'].strip().lower(),
-                "theme_color_pattern": f"{st.session_state['colour'].lower()}, {', '.join(st.session_state['pattern']).lower()}",
-                "theme_fit": ", ".join(st.session_state['fit']).lower(),
-                "theme_fabric_care": f"{', '.join(st.session_state['fabric']).lower()}, {', '.join(st.session_state['care']).lower()}",
-                "garment_closure": ", ".join(st.session_state['garment_closure']).lower(),
-                "occasion": ", ".join(st.session_state['occasion_region']).lower(),
-                "img": img_filename,
-                "description_generated": st.session_state.get("description", "")
-            }
-
-            # Deduplicate merged buckets as before
-            def dedup_buckets_row(row):
-                fabric = set(map(str.strip, row['theme_fabric_care'].split(','))) if row['theme_fabric_care'] else set()
-                colors = set(map(str.strip, row['theme_color_pattern'].split(','))) if row['theme_color_pattern'] else set()
-                fit = set(map(str.strip, row['theme_fit'].split(','))) if row['theme_fit'] else set()
-                colors -= fabric
-                fit -= fabric | colors
-                return pd.Series({
-                    'theme_merged_fabric_care': ', '.join(sorted(fabric)),
-                    'theme_merged_color_pattern': ', '.join(sorted(colors)),
-                    'theme_merged_fit': ', '.join(sorted(fit))
-                })
-            
-            merged_cols = dedup_buckets_row(base_row)
-            base_row.update(merged_cols.to_dict())
-
-            # Save formatted HTML
-            label_buckets = {
-                "Color and Pattern": ['theme_merged_color_pattern'],
-                "Fabric and Care": ['theme_merged_fabric_care'],
-                "Fit": ['theme_merged_fit'],
-                "Garment Closure": ['garment_closure'],
-                "Occasion & Region (Dupatta)": ['occasion']
-            }
-            
-            def format_row_html(row, buckets):
-                lines = []
-                for label, fields in buckets.items():
-                    values = []
-                    seen = set()
-                    for field in fields:
-                        if field in row and row[field]:
-                            for part in [x.strip() for x in str(row[field]).split(",") if x.strip()]:
-                                if part.lower() not in seen:
-                                    values.append(part)
-                                    seen.add(part.lower())
-                    if values:
-                        lines.append(f"{label}: {', '.join(values)}")
-                return "<br>".join(lines)
-
-            base_row["formatted"] = format_row_html(base_row, label_buckets)
-            base_row["description_generated"] = st.session_state.get("description", "")
-
-            # Save to CSV
-            df_final = pd.DataFrame([base_row]).reindex(columns=final_columns)
-            df_final.to_csv(csv_file, mode="a", index=False, header=False)
-
-            # -----------------------------
-            # SESSION CSV LOGIC (added only)
-            if "session_products" not in st.session_state:
-                st.session_state["session_products"] = pd.DataFrame(columns=final_columns)
-
-            st.session_state["session_products"] = pd.concat(
-                [st.session_state["session_products"], df_final],
-                ignore_index=True
-            )
-
-            csv_buffer = io.StringIO()
-            st.session_state["session_products"].to_csv(csv_buffer, index=False)
-            st.download_button(
-                label="Download Saved Product to CSV",
-                data=csv_buffer.getvalue().encode(),
-                file_name="saved_product.csv",
-                mime="text/csv"
-            )
-            # -----------------------------
-
-            st.success(f"Product '{st.session_state.get('name', '')}' saved successfully with ID {st.session_state['p_id']}!  Product cannot be updated after saving.")
-
-            # Reset for next product
-            st.session_state['p_id'] = generate_new_pid()
-            st.session_state['description'] = ""
-            st.session_state["saving"] = False
-    
 # --------------------------
 # Function to launch Streamlit with retries
 def find_available_port(start=8501, end=8510):
@@ -0,0 +1,217 @@
+# -----------------------------
+# StyleVision Description Index
+# MinHash + LSH similarity index over saved product descriptions
+# -----------------------------
+#
+# Catches near-duplicate openings/bodies without an extra LLM round trip.
+# The LSH band keys of each MinHash signature are persisted to an append-only
+# JSON-lines file next to the product CSV, so startup only reads them back (no
+# re-hashing) and every replica picks up descriptions saved by the others.
+
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+
+# Changing any of these invalidates a saved index file (delete it to rebuild)
+MINHASH_NUM_PERM = 64
+LSH_BANDS = 32                      # 32 bands x 2 rows -> candidates from ~0.2 Jaccard, verified exactly
+OPENING_SIMILARITY_THRESHOLD = 0.4  # Jaccard on word 2-grams of the first sentence
+BODY_SIMILARITY_THRESHOLD = 0.6     # Jaccard on word 3-grams of the whole description
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(1337)  # fixed seed so signatures are stable across restarts
+MINHASH_COEFFS = [
+    (_minhash_rng.randint(1, _MERSENNE_PRIME - 1), _minhash_rng.randint(0, _MERSENNE_PRIME - 1))
+    for _ in range(MINHASH_NUM_PERM)
+]
+
+# Words ending in "." that do not end a sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "st", "jr", "sr", "no", "vs", "etc", "approx", "incl",
+    "e.g", "i.e"
+}
+
+# generate_description() returns this instead of raising; such text is never indexed
+ERROR_PREFIX = "Error generating description"
+
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s)")
+
+def split_opening(text):
+    """Return the first sentence of a description, ignoring abbreviations like "Mr."."""
+    text = text.strip()
+    for match in _SENTENCE_END.finditer(text):
+        if match.group().startswith("."):
+            words = text[:match.start()].split()
+            if words and words[-1].lower().lstrip("(\"'") in ABBREVIATIONS:
+                continue
+        return text[:match.end()]
+    return text
+
+def is_usable_description(text):
+    return bool(text and text.strip()) and not text.startswith(ERROR_PREFIX)
+
+def shingles(text, k):
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+def minhash_signature(shingle_set):
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+        for s in shingle_set
+    ]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in MINHASH_COEFFS]
+
+def band_keys(signature):
+    """Collapse each LSH band of a signature into one short, stable bucket key."""
+    rows = MINHASH_NUM_PERM // LSH_BANDS
+    return [
+        hashlib.blake2b(f"{i}:{signature[i * rows:(i + 1) * rows]}".encode(), digest_size=8).hexdigest()
+        for i in range(LSH_BANDS)
+    ]
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class DescriptionIndex:
+    """LSH index over the openings and bodies of saved descriptions.
+
+    With a path, entries are appended to that JSON-lines file on add() and any
+    lines written by other processes are read in before each query().
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.openings = []
+        self.descriptions = []
+        self.buckets = {"opening": {}, "body": {}}
+        self._shingle_cache = {}
+        self._offset = 0
+        self.lock = threading.Lock()
+        if path:
+            self.refresh()
+
+    def __len__(self):
+        return len(self.openings)
+
+    def _ingest(self, entry):
+        doc_id = len(self.openings)
+        self.openings.append(entry["opening"])
+        self.descriptions.append(entry["description"])
+        for kind in ("opening", "body"):
+            buckets = self.buckets[kind]
+            for key in entry["bands"][kind]:
+                if key in buckets:
+                    buckets[key].append(doc_id)
+                else:
+                    buckets[key] = [doc_id]
+
+    def _doc_shingles(self, doc_id):
+        if doc_id not in self._shingle_cache:
+            self._shingle_cache[doc_id] = (
+                shingles(self.openings[doc_id], 2),
+                shingles(self.descriptions[doc_id], 3)
+            )
+        return self._shingle_cache[doc_id]
+
+    def refresh(self):
+        """Read entries appended to the index file since the last refresh."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with self.lock:
+            if os.path.getsize(self.path) <= self._offset:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+            # Leave a partially written last line for the next refresh
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if line.strip():
+                    self._ingest(json.loads(line))
+            self._offset += end
+
+    def add(self, description):
+        if not is_usable_description(description):
+            return
+        opening = split_opening(description)
+        opening_set = shingles(opening, 2)
+        body_set = shingles(description, 3)
+        if not opening_set or not body_set:
+            return
+        entry = {
+            "opening": opening,
+            "description": description,
+            "bands": {
+                "opening": band_keys(minhash_signature(opening_set)),
+                "body": band_keys(minhash_signature(body_set))
+            }
+        }
+        if not self.path:
+            with self.lock:
+                self._ingest(entry)
+            return
+        # A single O_APPEND write per line keeps concurrent writers from interleaving
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.refresh()
+
+    def query(self, description, limit=None):
+        """Return the openings of past near-duplicates of this description, most similar first."""
+        self.refresh()
+        opening_set = shingles(split_opening(description), 2)
+        body_set = shingles(description, 3)
+        scores = {}
+        with self.lock:
+            candidates = set()
+            for kind, shingle_set in (("opening", opening_set), ("body", body_set)):
+                if shingle_set:
+                    for key in band_keys(minhash_signature(shingle_set)):
+                        candidates.update(self.buckets[kind].get(key, ()))
+            for doc_id in candidates:
+                doc_opening_set, doc_body_set = self._doc_shingles(doc_id)
+                opening_score = jaccard(opening_set, doc_opening_set)
+                body_score = jaccard(body_set, doc_body_set)
+                if opening_score >= OPENING_SIMILARITY_THRESHOLD or body_score >= BODY_SIMILARITY_THRESHOLD:
+                    opening = self.openings[doc_id]
+                    scores[opening] = max(scores.get(opening, 0.0), opening_score, body_score)
+        conflicts = sorted(scores, key=lambda opening: (-scores[opening], opening))
+        return conflicts[:limit] if limit is not None else conflicts
+
+# --------------------------
+# Seeding from the product CSV
+def descriptions_from_csv(csv_path, row_columns):
+    """Yield the usable descriptions saved in the product CSV.
+
+    The app writes a header with more columns than the rows it appends
+    (row_columns), so each row is read by the layout that matches its length.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = {len(row_columns): row_columns.index("description_generated")}
+        if "description_generated" in header:
+            positions[len(header)] = header.index("description_generated")
+        for row in reader:
+            position = positions.get(len(row))
+            if position is not None and is_usable_description(row[position]):
+                yield row[position]
+
+def load_index(index_path, csv_path, row_columns):
+    """Open the index file, seeding it from the product CSV if it does not exist yet."""
+    if os.path.exists(index_path):
+        return DescriptionIndex(index_path)
+    index = DescriptionIndex(index_path)
+    if os.path.exists(csv_path):
+        for text in descriptions_from_csv(csv_path, row_columns):
+            index.add(text)
+    # Create the file even when nothing was seeded so the seed does not rerun on every start
+    open(index_path, "a", encoding="utf-8").close()
+    return index
@@ -0,0 +1,629 @@
+# -----------------------------
+# StyleVision Load Test Harness
+# Simulates many concurrent data-entry users against the full app
+# -----------------------------
+#
+# Starts `streamlit run` on a scratch copy of the app, then drives N concurrent
+# sessions over the same websocket + protobuf protocol the browser uses
+# (widget changes, fragment reruns, file uploads and button clicks). Groq and
+# the background image host are replaced by local fake servers in a separate
+# process. CPU and RSS are sampled from the Streamlit server process only
+# (Linux /proc), so the load generator's own cost is not counted.
+#
+# Usage:
+#   python load_test.py --levels 1,2,4,8,16 --iterations 3 --groq-latency 1.0
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+from tornado.websocket import websocket_connect
+
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.request
+import uuid
+
+from collections import Counter
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILES = ["FormGH_G_v3.py", "description_index.py"]
+
+STEPS = ["load", "fill", "upload", "generate", "save", "clear"]
+
+WIDGET_TYPES = {"text_input", "multiselect", "selectbox", "button", "file_uploader", "download_button"}
+
+RUN_DONE = {
+    ForwardMsg.FINISHED_SUCCESSFULLY,
+    ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+    ForwardMsg.FINISHED_WITH_COMPILE_ERROR
+}
+
+DESCRIPTION_WORDS = [
+    "sleek", "effortless", "bold", "timeless", "relaxed", "refined", "vibrant", "cosy",
+    "polished", "breezy", "versatile", "statement", "crisp", "easy", "luxurious", "playful"
+]
+
+# --------------------------
+# Fake upstream services
+def make_jpeg(size=(64, 64), colour=(204, 51, 0)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, colour).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+def make_fake_handler(groq_latency, background_bytes):
+    class FakeUpstreamHandler(BaseHTTPRequestHandler):
+        """Serves the Groq chat completions endpoint and the background image."""
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.startswith("/background"):
+                self._send(200, background_bytes, "image/jpeg")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, b"not found", "text/plain")
+                return
+            time.sleep(groq_latency)
+            rng = random.Random()
+            content = " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(12)).capitalize() + ". " + \
+                " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(40)) + "."
+            body = {
+                "id": f"chatcmpl-{rng.getrandbits(48):x}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "llama-3.1-8b-instant"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                    "logprobs": None
+                }],
+                "usage": {"prompt_tokens": 200, "completion_tokens": 60, "total_tokens": 260}
+            }
+            self._send(200, json.dumps(body).encode(), "application/json")
+
+    return FakeUpstreamHandler
+
+def serve_fakes(port, groq_latency):
+    """Entry point for the fake upstream process."""
+    handler = make_fake_handler(groq_latency, make_jpeg(size=(1920, 1080)))
+    ThreadingHTTPServer(("127.0.0.1", port), handler).serve_forever()
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for_url(url, timeout=30, process=None):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return False
+
+# --------------------------
+# App server under test
+def start_app_server(workdir, port, upstream_port):
+    """Run `streamlit run` on the scratch copy and wait until it is healthy."""
+    env = dict(
+        os.environ,
+        GROQ_BASE_URL=f"http://127.0.0.1:{upstream_port}",
+        STYLEVISION_BG_URL=f"http://127.0.0.1:{upstream_port}/background2.jpg"
+    )
+    log = open(os.path.join(workdir, "server.log"), "w")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", APP_FILES[0],
+            "--server.port", str(port),
+            "--server.address", "127.0.0.1",
+            "--server.headless", "true",
+            "--server.fileWatcherType", "none",
+            "--server.enableXsrfProtection", "false",
+            "--browser.gatherUsageStats", "false"
+        ],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    if not wait_for_url(f"http://127.0.0.1:{port}/_stcore/health", process=process):
+        process.terminate()
+        log.close()
+        with open(log.name) as f:
+            sys.exit(f"❌ Streamlit server did not start:\n{f.read()[-2000:]}")
+    return process, log
+
+# --------------------------
+# Resource sampling (CPU and RSS of the Streamlit server process)
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+def read_cpu_seconds(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rpartition(")")[2].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except OSError:
+        return float("nan")
+
+def read_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+class ResourceSampler:
+    """Samples a process's RSS on a background thread and measures its CPU time over a window."""
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.rss_samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.rss_samples.append(read_rss_mb(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._cpu_start = read_cpu_seconds(self.pid)
+        self._wall_start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.cpu_seconds = read_cpu_seconds(self.pid) - self._cpu_start
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.rss_samples.append(read_rss_mb(self.pid))
+
+    @property
+    def cpu_percent(self):
+        return 100 * self.cpu_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+# --------------------------
+# Websocket client speaking the browser's protocol
+class StreamlitClient:
+    """One browser session: tracks widgets and their values, and replays user input as reruns."""
+
+    def __init__(self, port, timeout):
+        self.port = port
+        self.timeout = timeout
+        self.ws = None
+        self.session_id = None
+        self.widgets = {}        # label -> (element type, element proto, fragment id)
+        self.widget_states = {}  # widget id -> WidgetState proto
+        self.elements = []       # (element type, element proto) produced by the last run
+        self._seen_ids = set()
+        self._msg_cache = {}
+
+    async def connect(self):
+        self.ws = await websocket_connect(
+            f"ws://127.0.0.1:{self.port}/_stcore/stream",
+            subprotocols=["streamlit"],
+            max_message_size=64 * 1024 * 1024
+        )
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def _read(self):
+        payload = await asyncio.wait_for(self.ws.read_message(), self.timeout)
+        if payload is None:
+            raise ConnectionError("websocket closed by server")
+        msg = ForwardMsg()
+        msg.ParseFromString(payload)
+        # Large messages are sent once, then referenced by hash
+        if msg.WhichOneof("type") == "ref_hash":
+            cached = ForwardMsg()
+            cached.CopyFrom(self._msg_cache[msg.ref_hash])
+            cached.metadata.CopyFrom(msg.metadata)
+            msg = cached
+        elif msg.hash:
+            self._msg_cache[msg.hash] = msg
+        return msg
+
+    def _handle(self, msg):
+        kind = msg.WhichOneof("type")
+        if kind == "new_session" and msg.new_session.initialize.session_id:
+            self.session_id = msg.new_session.initialize.session_id
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            element_type = element.WhichOneof("type")
+            proto = getattr(element, element_type)
+            self.elements.append((element_type, proto))
+            if element_type in WIDGET_TYPES:
+                self.widgets[proto.label] = (element_type, proto, msg.delta.fragment_id or None)
+                self._seen_ids.add(proto.id)
+        elif kind == "script_finished":
+            return msg.script_finished in RUN_DONE
+        return False
+
+    async def rerun(self, fragment_id=None, trigger_id=None):
+        back = BackMsg()
+        client_state = back.rerun_script
+        client_state.SetInParent()  # an empty first rerun must still select the oneof
+        for state in self.widget_states.values():
+            client_state.widget_states.widgets.append(state)
+        if trigger_id is not None:
+            trigger = client_state.widget_states.widgets.add()
+            trigger.id = trigger_id
+            trigger.trigger_value = True
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+        self.elements = []
+        self._seen_ids = set()
+        await self.ws.write_message(back.SerializeToString(), binary=True)
+        while not self._handle(await self._read()):
+            pass
+        if not fragment_id:
+            # Like the browser, forget values of widgets that are no longer on the page
+            self.widget_states = {k: v for k, v in self.widget_states.items() if k in self._seen_ids}
+        self.check_errors()
+
+    def check_errors(self):
+        for element_type, proto in self.elements:
+            if element_type == "exception":
+                raise RuntimeError(f"{proto.type}: {proto.message}")
+            if element_type == "alert" and proto.format == Alert.ERROR:
+                raise RuntimeError(proto.body)
+
+    def _widget(self, label):
+        if label not in self.widgets:
+            raise LookupError(f"Widget not found: {label}")
+        return self.widgets[label]
+
+    def _state(self, widget_id):
+        state = self.widget_states.get(widget_id)
+        if state is None:
+            state = self.widget_states[widget_id] = WidgetState(id=widget_id)
+        return state
+
+    async def set_text(self, label, value):
+        _, proto, fragment_id = self._widget(label)
+        self._state(proto.id).string_value = value
+        await self.rerun(fragment_id)
+
+    async def select(self, label, option):
+        element_type, proto, fragment_id = self._widget(label)
+        index = list(proto.options).index(option)
+        state = self._state(proto.id)
+        if element_type == "multiselect":
+            state.int_array_value.data[:] = [index]
+        else:
+            state.int_value = index
+        await self.rerun(fragment_id)
+
+    async def click(self, label):
+        _, proto, fragment_id = self._widget(label)
+        await self.rerun(fragment_id, trigger_id=proto.id)
+
+    async def upload(self, label, file_name, data, content_type="image/jpeg"):
+        """Request an upload URL, PUT the file, then rerun with it attached (as the browser does)."""
+        _, proto, fragment_id = self._widget(label)
+        back = BackMsg()
+        request_id = uuid.uuid4().hex
+        back.file_urls_request.request_id = request_id
+        back.file_urls_request.session_id = self.session_id
+        back.file_urls_request.file_names.append(file_name)
+        await self.ws.write_message(back.SerializeToString(), binary=True)
+        while True:
+            msg = await self._read()
+            if msg.WhichOneof("type") == "file_urls_response" and msg.file_urls_response.response_id == request_id:
+                file_urls = msg.file_urls_response.file_urls[0]
+                break
+
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        await AsyncHTTPClient().fetch(HTTPRequest(
+            f"http://127.0.0.1:{self.port}{file_urls.upload_url}",
+            method="PUT",
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            body=body,
+            request_timeout=self.timeout
+        ))
+
+        uploader = self._state(proto.id).file_uploader_state_value
+        uploader.max_file_id += 1
+        del uploader.uploaded_file_info[:]
+        info = uploader.uploaded_file_info.add()
+        info.id = uploader.max_file_id
+        info.name = file_name
+        info.size = len(data)
+        info.file_id = file_urls.file_id
+        info.file_urls.CopyFrom(file_urls)
+        await self.rerun(fragment_id)
+
+# --------------------------
+# Simulated editor session
+class EditorSession:
+    """Drives one user through fill -> upload -> generate -> save -> clear."""
+
+    def __init__(self, port, session_id, timeout):
+        self.port = port
+        self.session_id = session_id
+        self.timeout = timeout
+        self.latencies = {step: [] for step in STEPS}
+        self.errors = {step: 0 for step in STEPS}
+        self.error_messages = []
+        self.completed = 0
+        self.image_bytes = make_jpeg()
+        self.client = None
+
+    async def _timed(self, step, action):
+        start = time.perf_counter()
+        try:
+            await action()
+        except Exception as e:
+            self.errors[step] += 1
+            self.error_messages.append(f"{step}: {type(e).__name__}: {e}"[:200])
+            self.latencies[step].append(time.perf_counter() - start)
+            raise
+        self.latencies[step].append(time.perf_counter() - start)
+
+    async def _load(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = StreamlitClient(self.port, self.timeout)
+        await self.client.connect()
+        await self.client.rerun()
+
+    async def _fill(self):
+        c = self.client
+        fields = [
+            (c.set_text, "Product Name*", f"Load Test Dress {self.session_id}"),
+            (c.select, "Product Type*", "Dress"),
+            (c.set_text, "Price (USD)*", "49.99"),
+            (c.select, "Colour (Primary)*", "Navy"),
+            (c.select, "Pattern (Primary)*", "Floral"),
+            (c.set_text, "Brand Name*", "Zola"),
+            (c.select, "Fabric (choose all that apply)*", "Cotton"),
+            (c.select, "Care (choose all that apply)*", "Machine Wash"),
+            (c.select, "Fit (choose all that apply)*", "Regular"),
+            (c.select, "Garment Closure (choose all that apply)*", "Zip")
+        ]
+        # One rerun per field, as a real editor would trigger; each is timed as one interaction
+        for action, label, value in fields:
+            await self._timed("fill", lambda: action(label, value))
+
+    async def _upload(self):
+        await self.client.upload("Upload Product Image (.jpg required)*", "product.jpg", self.image_bytes)
+
+    async def _generate(self):
+        await self.client.click("Generate Description")
+        markdown = [p.body for t, p in self.client.elements if t == "markdown"]
+        if not any("Product Description Preview" in body for body in markdown):
+            raise RuntimeError("generate: no description preview")
+        if any("Error generating description" in body for body in markdown):
+            raise RuntimeError("generate: Groq call failed")
+
+    async def _save(self):
+        await self.client.click("Save Product")
+        if not any(
+            t == "alert" and p.format == Alert.SUCCESS and "saved successfully" in p.body
+            for t, p in self.client.elements
+        ):
+            raise RuntimeError("save: no success message")
+
+    async def _clear(self):
+        await self.client.click("Clear Form")
+
+    async def run(self, iterations):
+        try:
+            await self._timed("load", self._load)
+        except Exception:
+            if self.client is not None:
+                self.client.close()
+            return
+        for _ in range(iterations):
+            try:
+                await self._fill()
+                await self._timed("upload", self._upload)
+                await self._timed("generate", self._generate)
+                await self._timed("save", self._save)
+                await self._timed("clear", self._clear)
+                self.completed += 1
+            except Exception:
+                # Start the next workflow from a fresh session
+                try:
+                    await self._load()
+                except Exception:
+                    break
+        self.client.close()
+
+# --------------------------
+# Reporting helpers
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def make_workdir():
+    """Copy the app into a scratch dir so img/ and the CSV stay untouched."""
+    workdir = tempfile.mkdtemp(prefix="stylevision_load_")
+    for name in APP_FILES:
+        shutil.copy(os.path.join(APP_DIR, name), workdir)
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write('GROQ_API_KEY = "load-test-key"\n')
+    return workdir
+
+def run_level(upstream_port, concurrency, iterations, timeout):
+    # A fresh copy per level, so every N starts with an empty CSV and description index
+    workdir = make_workdir()
+    port = find_free_port()
+    try:
+        server, log = start_app_server(workdir, port, upstream_port)
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    sessions = [EditorSession(port, i, timeout) for i in range(concurrency)]
+
+    async def run_sessions():
+        await asyncio.gather(*(s.run(iterations) for s in sessions))
+
+    try:
+        with ResourceSampler(server.pid) as sampler:
+            asyncio.run(run_sessions())
+    finally:
+        server.terminate()
+        server.wait()
+        log.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {"concurrency": concurrency, "steps": {}}
+    for step in STEPS:
+        latencies = [x for s in sessions for x in s.latencies[step]]
+        errors = sum(s.errors[step] for s in sessions)
+        result["steps"][step] = {
+            "count": len(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "error_rate": errors / len(latencies) if latencies else 0.0
+        }
+    completed = sum(s.completed for s in sessions)
+    attempted = concurrency * iterations
+    result["workflows_completed"] = completed
+    result["workflow_error_rate"] = 1 - completed / attempted if attempted else 0.0
+    result["throughput"] = completed / sampler.wall_seconds if sampler.wall_seconds else 0.0
+    result["wall_seconds"] = sampler.wall_seconds
+    result["cpu_percent"] = sampler.cpu_percent
+    result["rss_peak_mb"] = max(sampler.rss_samples)
+    result["top_errors"] = Counter(m for s in sessions for m in s.error_messages).most_common(3)
+    return result
+
+def find_saturation(results, max_p95, max_error_rate, min_scaling):
+    """Return (concurrency, reason) for the first level where the replica saturates."""
+    previous = None
+    for result in results:
+        interactive_p95 = max(result["steps"][step]["p95"] for step in ("fill", "upload", "clear"))
+        if result["workflow_error_rate"] > max_error_rate:
+            return result["concurrency"], f"workflow error rate {result['workflow_error_rate']:.1%}"
+        if interactive_p95 > max_p95:
+            return result["concurrency"], f"interactive p95 {interactive_p95:.2f}s > {max_p95:.2f}s"
+        if previous and result["throughput"] < previous["throughput"] * (1 + min_scaling):
+            return result["concurrency"], "throughput stopped scaling"
+        previous = result
+    return None, "not reached"
+
+def print_report(results, saturation):
+    print("\n=== StyleVision load test ===")
+    for result in results:
+        print(
+            f"\nN={result['concurrency']}: {result['workflows_completed']} workflows in "
+            f"{result['wall_seconds']:.1f}s ({result['throughput']:.2f}/s), "
+            f"server CPU {result['cpu_percent']:.0f}%, peak RSS {result['rss_peak_mb']:.0f} MB, "
+            f"workflow errors {result['workflow_error_rate']:.1%}"
+        )
+        print(f"  {'step':<10}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'errors':>9}")
+        for step in STEPS:
+            s = result["steps"][step]
+            print(
+                f"  {step:<10}{s['count']:>7}{s['p50']:>9.3f}{s['p95']:>9.3f}"
+                f"{s['p99']:>9.3f}{s['error_rate']:>9.1%}"
+            )
+        # Show why steps failed, so harness problems are not mistaken for saturation
+        for message, count in result["top_errors"]:
+            print(f"  ! {count}x {message}")
+    concurrency, reason = saturation
+    if concurrency is None:
+        print("\nSaturation point: not reached at the tested levels")
+    else:
+        print(f"\nSaturation point: N={concurrency} ({reason})")
+
+# --------------------------
+# Main
+def main():
+    parser = argparse.ArgumentParser(description="Load test the StyleVision Product Entry app.")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrent session counts")
+    parser.add_argument("--iterations", type=int, default=3, help="Workflows per session per level")
+    parser.add_argument("--groq-latency", type=float, default=1.0, help="Fake Groq response delay (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-rerun timeout (s)")
+    parser.add_argument("--max-p95", type=float, default=1.0, help="Interactive-step p95 limit (s)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Workflow error rate limit")
+    parser.add_argument("--min-scaling", type=float, default=0.1, help="Minimum throughput gain per level")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+
+    upstream_port = find_free_port()
+    fakes = multiprocessing.Process(target=serve_fakes, args=(upstream_port, args.groq_latency), daemon=True)
+    fakes.start()
+    if not wait_for_url(f"http://127.0.0.1:{upstream_port}/background2.jpg", timeout=10):
+        fakes.terminate()
+        sys.exit("❌ Fake upstream server did not start")
+    print(f"✅ Fake Groq and background host on port {upstream_port}", file=sys.stderr)
+
+    results = []
+    try:
+        for concurrency in levels:
+            print(f"▶ Running N={concurrency}...", file=sys.stderr)
+            try:
+                results.append(run_level(upstream_port, concurrency, args.iterations, args.timeout))
+            except Exception:
+                traceback.print_exc()
+                break
+    finally:
+        fakes.terminate()
+
+    saturation = find_saturation(results, args.max_p95, args.max_error_rate, args.min_scaling)
+    print_report(results, saturation)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({
+                "results": results,
+                "saturation": {"concurrency": saturation[0], "reason": saturation[1]}
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
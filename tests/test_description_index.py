@@ -0,0 +1,123 @@
+import os
+
+import pandas as pd
+import pytest
+
+from description_index import (
+    BODY_SIMILARITY_THRESHOLD, OPENING_SIMILARITY_THRESHOLD, DescriptionIndex,
+    jaccard, load_index, minhash_signature, shingles, split_opening
+)
+
+# Same layouts as FormGH_G_v3.py: the header written on first run, and the rows it appends
+CSV_HEADER = [
+    "p_id", "name", "products", "price", "brand", "cold_start", "rating_bucket",
+    "img", "theme_merged_color_pattern", "theme_merged_fit", "theme_merged_fabric_care",
+    "formatted", "description_generated"
+]
+FINAL_COLUMNS = [
+    "p_id", "name", "products", "price", "brand", "img",
+    "theme_merged_color_pattern", "theme_merged_fit", "theme_merged_fabric_care",
+    "formatted", "description_generated"
+]
+
+SAVED = (
+    "Step into effortless elegance with the Aria Wrap Dress from Zola. "
+    "Crafted from soft cotton, it features a floral pattern and tie closure. Machine wash cold."
+)
+SIMILAR_OPENING = (
+    "Step into effortless elegance with the Luna Shirt from Zola. "
+    "Made from linen with stripes and buttons. Hand wash only."
+)
+UNRELATED = (
+    "Meet the Ridge Hoodie, a cosy everyday layer in grey fleece with a drawstring hood. "
+    "Tumble dry low."
+)
+
+def test_split_opening_returns_first_sentence():
+    assert split_opening(SAVED) == "Step into effortless elegance with the Aria Wrap Dress from Zola."
+
+def test_split_opening_skips_abbreviations():
+    text = "Mr. Porter's Dr. Martens-inspired boots, e.g. for winter. Built to last."
+    assert split_opening(text) == "Mr. Porter's Dr. Martens-inspired boots, e.g. for winter."
+
+def test_split_opening_without_terminator_returns_whole_text():
+    assert split_opening("  A single line with no full stop  ") == "A single line with no full stop"
+
+def test_shingles():
+    assert shingles("Soft, cosy cotton!", 2) == {"soft cosy", "cosy cotton"}
+    assert shingles("Cotton", 3) == {"cotton"}
+    assert shingles("", 3) == set()
+
+def test_minhash_signature_is_deterministic_and_tracks_jaccard():
+    a = shingles(SAVED, 3)
+    b = shingles(SAVED + " Pairs well with sandals.", 3)
+    sig_a, sig_b = minhash_signature(a), minhash_signature(b)
+    assert sig_a == minhash_signature(set(a))
+    estimate = sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+    assert estimate == pytest.approx(jaccard(a, b), abs=0.25)
+
+def test_thresholds_separate_examples():
+    assert jaccard(shingles(split_opening(SAVED), 2), shingles(split_opening(SIMILAR_OPENING), 2)) \
+        >= OPENING_SIMILARITY_THRESHOLD
+    assert jaccard(shingles(SAVED, 3), shingles(UNRELATED, 3)) < BODY_SIMILARITY_THRESHOLD
+
+def test_query_flags_near_duplicate_opening_only():
+    index = DescriptionIndex()
+    index.add(SAVED)
+    assert index.query(SIMILAR_OPENING) == [split_opening(SAVED)]
+    assert index.query(UNRELATED) == []
+
+def test_index_persists_and_sees_other_writers(tmp_path):
+    path = str(tmp_path / "description_index.jsonl")
+    first = DescriptionIndex(path)
+    first.add(SAVED)
+
+    # A second process starting later loads the saved entries without re-hashing them
+    second = DescriptionIndex(path)
+    assert len(second) == 1
+    assert second.query(SIMILAR_OPENING) == [split_opening(SAVED)]
+
+    # Entries saved by one replica are picked up by the other on its next query
+    second.add(UNRELATED)
+    assert first.query(UNRELATED) == [split_opening(UNRELATED)]
+    assert len(first) == 2
+
+def test_query_ranks_by_similarity_and_limits():
+    index = DescriptionIndex()
+    for i, adjective in enumerate(["bold", "breezy", "crisp", "easy", "playful", "refined"]):
+        index.add(f"Introducing the {adjective} Aria Dress from Zola. Style number {i} in soft cotton.")
+    exact = "Introducing the crisp Aria Dress from Zola. Style number 2 in soft cotton."
+    conflicts = index.query(exact)
+    assert len(conflicts) == 6
+    assert conflicts[0] == "Introducing the crisp Aria Dress from Zola."
+    assert index.query(exact, limit=3) == conflicts[:3]
+
+def test_error_text_is_never_indexed():
+    index = DescriptionIndex()
+    index.add("Error generating description: rate limited")
+    index.add("   ")
+    assert len(index) == 0
+
+def test_load_index_seeds_from_csv_written_by_the_app(tmp_path):
+    csv_path = str(tmp_path / "final_output.csv")
+    index_path = str(tmp_path / "description_index.jsonl")
+    pd.DataFrame(columns=CSV_HEADER).to_csv(csv_path, index=False)
+    for p_id, description in [
+        ("2600000001", SAVED),
+        ("2600000002", "Error generating description: timeout"),
+        ("2600000003", UNRELATED + "\nSecond paragraph, with a comma.")
+    ]:
+        row = {"p_id": p_id, "name": "Test", "description_generated": description}
+        pd.DataFrame([row]).reindex(columns=FINAL_COLUMNS).to_csv(csv_path, mode="a", index=False, header=False)
+
+    index = load_index(index_path, csv_path, FINAL_COLUMNS)
+    assert len(index) == 2
+    assert index.query(SIMILAR_OPENING) == [split_opening(SAVED)]
+    assert len(DescriptionIndex(index_path)) == 2
+
+def test_load_index_writes_file_even_when_nothing_is_seeded(tmp_path):
+    csv_path = str(tmp_path / "final_output.csv")
+    index_path = str(tmp_path / "description_index.jsonl")
+    pd.DataFrame(columns=CSV_HEADER).to_csv(csv_path, index=False)
+    assert len(load_index(index_path, csv_path, FINAL_COLUMNS)) == 0
+    assert os.path.exists(index_path)
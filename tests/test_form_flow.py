@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import shutil
+
+import pandas as pd
+import pytest
+
+from load_test import (
+    StreamlitClient, find_free_port, make_jpeg, make_workdir, serve_fakes,
+    start_app_server, wait_for_url
+)
+
+# Drives a real `streamlit run` over the browser's websocket protocol, so widget
+# changes and button clicks rerun only their fragment, as they do in production.
+
+FIELDS = [
+    ("text", "Product Name*", "Flow Test Dress"),
+    ("select", "Product Type*", "Dress"),
+    ("text", "Price (USD)*", "49.99"),
+    ("select", "Colour (Primary)*", "Navy"),
+    ("select", "Pattern (Primary)*", "Floral"),
+    ("text", "Brand Name*", "Zola"),
+    ("select", "Fabric (choose all that apply)*", "Cotton"),
+    ("select", "Care (choose all that apply)*", "Machine Wash"),
+    ("select", "Fit (choose all that apply)*", "Regular"),
+    ("select", "Garment Closure (choose all that apply)*", "Zip")
+]
+
+@pytest.fixture(scope="module")
+def app():
+    upstream_port = find_free_port()
+    fakes = multiprocessing.Process(target=serve_fakes, args=(upstream_port, 0.0), daemon=True)
+    fakes.start()
+    assert wait_for_url(f"http://127.0.0.1:{upstream_port}/background2.jpg", timeout=10)
+    workdir = make_workdir()
+    port = find_free_port()
+    server, log = start_app_server(workdir, port, upstream_port)
+    yield port, workdir
+    server.terminate()
+    server.wait()
+    log.close()
+    fakes.terminate()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+async def open_form(port):
+    client = StreamlitClient(port, timeout=30)
+    await client.connect()
+    await client.rerun()
+    return client
+
+async def fill(client, fields=FIELDS):
+    for kind, label, value in fields:
+        if kind == "text":
+            await client.set_text(label, value)
+        else:
+            await client.select(label, value)
+
+async def save(client):
+    await client.click("Save Product")
+    for element_type, proto in client.elements:
+        if element_type == "alert":
+            match = re.search(r"saved successfully with ID (\d+_\d+)", proto.body)
+            if match:
+                return match.group(1)
+    raise AssertionError("no success message after Save")
+
+def test_save_writes_image_under_each_saved_id(app):
+    port, workdir = app
+
+    async def flow():
+        client = await open_form(port)
+        await fill(client)
+        await client.upload("Upload Product Image (.jpg required)*", "product.jpg", make_jpeg())
+        # Saving twice without touching the form: the second product gets a new ID
+        first = await save(client)
+        second = await save(client)
+        client.close()
+        return first, second
+
+    first, second = asyncio.run(flow())
+    assert first != second
+    for p_id in (first, second):
+        assert os.path.exists(os.path.join(workdir, "img", f"{p_id}.jpg"))
+    saved = pd.read_csv(os.path.join(workdir, "ecommerce", "final_output.csv"), header=None, skiprows=1, dtype=str)
+    rows = saved[saved[0].isin([first, second])]
+    assert sorted(rows[5]) == sorted([f"{first}.jpg", f"{second}.jpg"])
+
+def test_edit_after_clear_form_is_kept(app):
+    port, _ = app
+
+    async def flow():
+        client = await open_form(port)
+        await fill(client, FIELDS[:1])
+        await client.click("Clear Form")
+        await client.set_text("Product Name*", "After Clear")
+        with pytest.raises(RuntimeError, match="Please fill in all mandatory fields") as error:
+            await client.click("Save Product")
+        client.close()
+        return str(error.value)
+
+    message = asyncio.run(flow())
+    assert "Product Name" not in message
+    assert "Brand Name" in message
+
+def test_invalid_price_blocks_save(app):
+    port, _ = app
+
+    async def flow():
+        client = await open_form(port)
+        await fill(client, [f for f in FIELDS if f[1] != "Price (USD)*"])
+        await client.upload("Upload Product Image (.jpg required)*", "product.jpg", make_jpeg())
+        with pytest.raises(RuntimeError, match="valid price"):
+            await client.set_text("Price (USD)*", "forty")
+        with pytest.raises(RuntimeError, match="Please fill in all mandatory fields: Price"):
+            await client.click("Save Product")
+        client.close()
+
+    asyncio.run(flow())